@@ -0,0 +1,146 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+
+# The pipeline modules read their database URL at import time, so point them at
+# the local benchmark database before importing them.
+BENCH_DB_URL = os.environ.get("BENCH_DB_URL", "postgresql://localhost:5432/chicago_inspections_bench")
+os.environ["SUPABASE_DB_URL"] = BENCH_DB_URL
+os.environ.setdefault("CHICAGO_API_TOKEN", "benchmark")
+
+import load_data
+import export_for_tableau
+import metrics
+import setup_database
+from synthetic_inspections import generate_records
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_FILE = "benchmark_results.json"
+# A stage counts as a regression when it is this much slower than the baseline
+REGRESSION_THRESHOLD = 1.25
+
+
+def reset_schema(conn):
+    cur = conn.cursor()
+    cur.execute(f"DROP TABLE IF EXISTS {', '.join(reversed(setup_database.TABLES))};")
+    conn.commit()
+    cur.close()
+    setup_database.create_tables(conn)
+
+def seed_google_ratings(conn, seed=0.42):
+    cur = conn.cursor()
+    cur.execute("SELECT setseed(%s);", (seed,))
+    cur.execute("""
+        INSERT INTO google_ratings (restaurant_id, place_id, rating, user_ratings_total)
+        SELECT id, 'places/bench' || id, round((1 + random() * 4)::numeric, 1), (random() * 2000)::int
+        FROM restaurants
+        WHERE random() < 0.6;
+    """)
+    conn.commit()
+    cur.close()
+
+
+def measure(results, size, name, func, *args, rows=None):
+    """
+    Time one stage and record how far resident memory rose above where it
+    started. RSS is sampled from a background thread rather than traced with
+    tracemalloc, which would slow the timed call several-fold.
+    """
+    gc.collect()
+    sampler = metrics.RSSSampler()
+    sampler.start()
+    start = time.perf_counter()
+    value = func(*args)
+    duration = time.perf_counter() - start
+    peak = sampler.stop()
+
+    if rows is None:
+        rows = len(value) if hasattr(value, "__len__") else size
+    results.append({
+        "size": size,
+        "stage": name,
+        "rows": rows,
+        "duration_s": round(duration, 4),
+        "rows_per_sec": round(rows / duration, 1) if duration else None,
+        "peak_rss_delta_mb": round(peak, 1) if peak is not None else None,
+    })
+    memory = f"{peak:>9.1f} MB" if peak is not None else f"{'n/a':>12}"
+    print(f"{size:>10,}  {name:<30} {rows:>10,} {duration:>9.2f}s {memory}", flush=True)
+    return value
+
+
+def run_size(size, stages, seed):
+    results = []
+    records = measure(results, size, "generate_records", generate_records, size, seed)
+    df = measure(results, size, "frame_from_records", load_data.frame_from_records, records)
+    del records
+    df = measure(results, size, "clean_data", load_data.clean_data, df)
+    df = measure(results, size, "standardize_chain_names", load_data.standardize_chain_names, df)
+
+    if "db" in stages:
+        conn = load_data.get_connection()
+        reset_schema(conn)
+        measure(results, size, "insert_restaurants", load_data.insert_restaurants, df, conn,
+                rows=df["License #"].nunique())
+        measure(results, size, "insert_inspections", load_data.insert_inspections, df, conn, rows=len(df))
+        seed_google_ratings(conn)
+        conn.close()
+
+    violations = df["Violations"].where(df["Violations"] != "Unknown")
+    measure(results, size, "extract_codes", violations.apply, export_for_tableau.extract_codes)
+    del df
+
+    if "db" in stages:
+        facility_filter = export_for_tableau.build_facility_filter()
+        for export in [export_for_tableau.export_inspections,
+                       export_for_tableau.export_inspection_categories,
+                       export_for_tableau.export_restaurants,
+                       export_for_tableau.export_google_ratings]:
+            measure(results, size, export.__name__, export, facility_filter, False)
+
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["size"], r["stage"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        base = baseline.get((r["size"], r["stage"]))
+        if base and base["duration_s"] and r["duration_s"] > base["duration_s"] * REGRESSION_THRESHOLD:
+            regressions.append(r)
+            print(f"REGRESSION {r['size']:,} {r['stage']}: "
+                  f"{base['duration_s']:.2f}s -> {r['duration_s']:.2f}s", flush=True)
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic inspections.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-db", action="store_true",
+                        help="only run the in-memory stages (no local Postgres needed)")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", help="earlier results file; exit non-zero on regressions")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stages = set() if args.no_db else {"db"}
+
+    print(f"{'size':>10}  {'stage':<30} {'rows':>10} {'time':>10} {'peak mem':>12}", flush=True)
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, stages, args.seed))
+
+    with open(args.output, "w") as f:
+        json.dump({"seed": args.seed, "database": not args.no_db, "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}", flush=True)
+
+    if args.baseline and compare(results, args.baseline):
+        sys.exit(1)
@@ -0,0 +1,24 @@
+#Targeted clean-up for biggest chains
+CHAIN_VARIANTS = {
+    "popeyes": ["popeyes", "popeye's"],
+    "wendy's": ["wendys", "wendy's"],
+    "mcdonald's": ["mcdonalds", "mcdonald's", "mc donalds", "mc donald's"],
+    "arby's": ["arbys", "arby's"],
+    "kfc": ["kfc", "kentucky fried chicken"],
+    "little caesars": ["little caesars", "little caesar's", "little caesar"]
+}
+
+
+def canonical_chain_name(name):
+    """
+    Any name containing a chain variant (case-insensitive) becomes the
+    uppercase canonical chain name; other names are returned unchanged.
+    A name matching several chains gets the first one in CHAIN_VARIANTS.
+    """
+    if not name:
+        return name
+    lowered = name.lower()
+    for canonical, variants in CHAIN_VARIANTS.items():
+        if any(variant in lowered for variant in variants):
+            return canonical.upper()
+    return name
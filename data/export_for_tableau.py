@@ -3,11 +3,14 @@ import pandas as pd
 import re
 import os
 
+import metrics
+import schema
+
 SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 if not SUPABASE_DB_URL:
     raise ValueError("SUPABASE_DB_URL environment variable not set")
 
-engine = create_engine(SUPABASE_DB_URL)
+engine = metrics.track_engine(create_engine(SUPABASE_DB_URL))
 
 VIOLATION_CATEGORIES = {
     **dict.fromkeys([18, 19, 20, 21, 22, 23, 24, 25, 30, 33, 34, 36], "Food Safety & Temperature"),
@@ -28,9 +31,25 @@ def build_facility_filter():
     return " OR ".join(f"UPPER(r.facility_type) LIKE '%{kw}%'" for kw in INCLUDED_FACILITY_KEYWORDS)
 
 
-def read_sql_clean(query):
-    df = pd.read_sql(text(query), engine)
-    return df.replace([float('inf'), float('-inf')], pd.NA).fillna('')
+def read_sql_clean(query, tables, chunksize=50000):
+    """
+    Stream query results through a server-side cursor and cast each chunk to
+    the schema dtypes as it arrives, so the full result never sits in memory
+    as object columns.
+    """
+    dtypes = schema.dtypes_for(*tables)
+    chunks = []
+    with metrics.stage("read_sql") as s:
+        with engine.connect().execution_options(stream_results=True) as conn:
+            for chunk in pd.read_sql(text(query), conn, chunksize=chunksize):
+                chunk = chunk.replace([float('inf'), float('-inf')], pd.NA)
+                chunk = schema.apply_schema(chunk, dtypes)
+                other = chunk.columns.difference(list(dtypes))
+                chunk[other] = chunk[other].fillna('')
+                chunks.append(chunk)
+        df = schema.concat_chunks(chunks)
+        s.rows = len(df)
+    return df
 
 
 def extract_codes(text):
@@ -48,7 +67,7 @@ def map_categories(codes):
     return ', '.join(sorted(categories)) if categories else None
 
 
-def export_inspections(facility_filter):
+def export_inspections(facility_filter, save=True):
     query = f"""
     SELECT i.id, i.restaurant_license, i.inspection_date, i.result,
         r.dba_name, r.address, r.zip, i.violations
@@ -59,8 +78,9 @@ def export_inspections(facility_filter):
         AND i.result != 'Out of Business'
     ORDER BY i.inspection_date DESC
     """
-    df = read_sql_clean(query)
-    df['violation_codes'] = df['violations'].apply(extract_codes)
+    df = read_sql_clean(query, ('inspections', 'restaurants'))
+    with metrics.stage("extract_codes", rows=len(df)):
+        df['violation_codes'] = df['violations'].apply(extract_codes)
 
     df['violation_count'] = df['violation_codes'].apply(
         lambda x: len(x.split(',')) if x else 0
@@ -69,11 +89,13 @@ def export_inspections(facility_filter):
     df['inspection_date'] = pd.to_datetime(
         df['inspection_date']).dt.strftime('%Y-%m-%d')
     df = df.drop(columns=['violations'])
-    df.to_csv(os.path.join(OUTPUT_DIR, 'inspections.csv'), index=False)
+    if save:
+        df.to_csv(os.path.join(OUTPUT_DIR, 'inspections.csv'), index=False)
     print(f"Inspections: {len(df):,} rows")
+    return df
 
 
-def export_inspection_categories(facility_filter):
+def export_inspection_categories(facility_filter, save=True):
     query = f"""
     SELECT i.id, i.restaurant_license, i.inspection_date, i.result, i.violations,
            r.dba_name, r.address, r.zip
@@ -83,33 +105,38 @@ def export_inspection_categories(facility_filter):
       AND ({facility_filter})
       AND i.result != 'Out of Business'
     """
-    df = read_sql_clean(query)
+    df = read_sql_clean(query, ('inspections', 'restaurants'))
 
     df = df[df['violations'].notna() & df['violations'].str.strip().ne('')]
     
-    df['violation_codes'] = df['violations'].apply(extract_codes)
+    with metrics.stage("extract_codes", rows=len(df)):
+        df['violation_codes'] = df['violations'].apply(extract_codes)
     
     df['violation_code_list'] = df['violation_codes'].str.split(',')
     
-    df_codes = df.explode('violation_code_list')
+    with metrics.stage("explode", rows=len(df)):
+        df_codes = df.explode('violation_code_list')
     
     df_codes['violation_category'] = df_codes['violation_code_list'].map(lambda x: VIOLATION_CATEGORIES.get(int(x)) if x else None)
     
     df_codes = df_codes.dropna(subset=['violation_category'])
+    df_codes['violation_category'] = df_codes['violation_category'].astype(schema.CATEGORY)
     
-    df_codes['category_violation_count'] = df_codes.groupby(['id', 'violation_category'])['violation_code_list'].transform('count')
+    df_codes['category_violation_count'] = df_codes.groupby(['id', 'violation_category'], observed=True)['violation_code_list'].transform('count')
 
     df_expanded = df_codes.drop(columns=['violations', 'violation_codes', 'violation_code_list']) \
                         .drop_duplicates(subset=['id', 'violation_category'])
 
     df_expanded['inspection_date'] = pd.to_datetime(df_expanded['inspection_date']).dt.strftime('%Y-%m-%d')
 
-    df_expanded.to_csv(os.path.join(OUTPUT_DIR, 'inspection_categories.csv'), index=False)
+    if save:
+        df_expanded.to_csv(os.path.join(OUTPUT_DIR, 'inspection_categories.csv'), index=False)
     print(f"Inspection categories: {len(df_expanded):,} rows")
+    return df_expanded
 
 
 
-def export_restaurants(facility_filter):
+def export_restaurants(facility_filter, save=True):
     query = f"""
     SELECT DISTINCT r.*
     FROM restaurants r
@@ -120,12 +147,14 @@ def export_restaurants(facility_filter):
     )
     AND ({facility_filter})
     """
-    df = read_sql_clean(query)
-    df.to_csv(os.path.join(OUTPUT_DIR, 'restaurants.csv'), index=False)
+    df = read_sql_clean(query, ('restaurants',))
+    if save:
+        df.to_csv(os.path.join(OUTPUT_DIR, 'restaurants.csv'), index=False)
     print(f"Restaurants: {len(df):,} rows")
+    return df
 
 
-def export_google_ratings(facility_filter):
+def export_google_ratings(facility_filter, save=True):
     query = f"""
     SELECT gr.*
     FROM google_ratings gr
@@ -140,15 +169,34 @@ def export_google_ratings(facility_filter):
         AND ({facility_filter})
     )
     """
-    df = read_sql_clean(query)
-    df.to_csv(os.path.join(OUTPUT_DIR, 'google_ratings.csv'), index=False)
+    df = read_sql_clean(query, ('google_ratings',))
+    if save:
+        df.to_csv(os.path.join(OUTPUT_DIR, 'google_ratings.csv'), index=False)
     print(f"Google Ratings: {len(df):,} rows")
+    return df
 
 
-if __name__ == "__main__":
+def export_all(save=True):
+    """Run every export and return the frames keyed by table name."""
     facility_filter = build_facility_filter()
-    export_inspections(facility_filter)
-    export_inspection_categories(facility_filter)
-    export_restaurants(facility_filter)
-    export_google_ratings(facility_filter)
-    print("Export complete!")
+    exports = {
+        'inspections': export_inspections,
+        'inspection_categories': export_inspection_categories,
+        'restaurants': export_restaurants,
+        'google_ratings': export_google_ratings,
+    }
+    frames = {}
+    for table_name, export in exports.items():
+        with metrics.stage(table_name) as s:
+            frames[table_name] = export(facility_filter, save)
+            s.rows = len(frames[table_name])
+    return frames
+
+
+if __name__ == "__main__":
+    try:
+        with metrics.stage("export"):
+            export_all()
+        print("Export complete!")
+    finally:
+        metrics.write_report()
@@ -5,16 +5,10 @@ import os
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
+import metrics
+import schema
+from chains import canonical_chain_name
 
-#Targeted clean-up for biggest chains
-CHAIN_VARIANTS = {
-    "popeyes": ["popeyes", "popeye's"],
-    "wendy's": ["wendys", "wendy's"],
-    "mcdonald's": ["mcdonalds", "mcdonald's", "mc donalds", "mc donald's"],
-    "arby's": ["arbys", "arby's"],
-    "kfc": ["kfc", "kentucky fried chicken"],
-    "little caesars": ["little caesars", "little caesar's", "little caesar"]
-}
 
 CHICAGO_API_TOKEN = os.environ.get("CHICAGO_API_TOKEN")
 if not CHICAGO_API_TOKEN:
@@ -33,7 +27,8 @@ def get_connection():
         user=parsed_url.username,
         password=parsed_url.password,
         host=parsed_url.hostname,
-        port=parsed_url.port
+        port=parsed_url.port,
+        cursor_factory=metrics.CountingCursor
     )
     print("Connected!", flush=True)
     return conn
@@ -61,11 +56,17 @@ def fetch_inspection_data(conn):
 
     headers = {"X-App-Token": CHICAGO_API_TOKEN}
     response = requests.get(url, headers=headers, timeout=180)
+    metrics.count_http()
     response.raise_for_status()
 
     data = response.json()
     print(f"Fetched {len(data)} records from JSON API.", flush=True)
 
+    return frame_from_records(data)
+
+
+def frame_from_records(data):
+    """Build a DataFrame with the dashboard's column names from SODA JSON records."""
     df = pd.DataFrame(data)
     df.columns = [col.strip().replace("_", " ").title() for col in df.columns]
     rename_map = {
@@ -96,16 +97,10 @@ def clean_data(df):
         if col in df.columns:
             df[col] = df[col].fillna("Unknown")
 
-    return df
+    return schema.apply_schema(df, schema.INGEST_COLUMNS)
 
 def standardize_chain_names(df):
-    df["AKA Name"] = df["AKA Name"].astype(str)
-
-    for canonical, variants in CHAIN_VARIANTS.items():
-        for variant in variants:
-            mask = df["AKA Name"].str.contains(variant, case=False, na=False)
-            df.loc[mask, "AKA Name"] = canonical.upper()  # overwrite directly and make uppercase
-
+    df["AKA Name"] = df["AKA Name"].astype(str).map(canonical_chain_name)
     return df
 
 
@@ -129,7 +124,12 @@ def insert_restaurants(df, conn):
                     state = EXCLUDED.state,
                     zip = EXCLUDED.zip,
                     latitude = EXCLUDED.latitude,
-                    longitude = EXCLUDED.longitude;
+                    longitude = EXCLUDED.longitude
+                WHERE (restaurants.dba_name, restaurants.aka_name, restaurants.address, restaurants.city,
+                       restaurants.state, restaurants.zip, restaurants.latitude, restaurants.longitude)
+                    IS DISTINCT FROM
+                      (EXCLUDED.dba_name, EXCLUDED.aka_name, EXCLUDED.address, EXCLUDED.city,
+                       EXCLUDED.state, EXCLUDED.zip, EXCLUDED.latitude, EXCLUDED.longitude);
             """, (
                 int(row['License #']) if pd.notna(row['License #']) else None,
                 row['DBA Name'],
@@ -142,13 +142,14 @@ def insert_restaurants(df, conn):
                 float(row['Latitude']) if pd.notna(row['Latitude']) else None,
                 float(row['Longitude']) if pd.notna(row['Longitude']) else None
             ))
-            inserted += 1
+            inserted += cur.rowcount
         except Exception as e:
             print(f"Error inserting restaurant {row['License #']}: {e}", flush=True)
 
     conn.commit()
     cur.close()
     print(f"Inserted/updated {inserted} restaurants", flush=True)
+    return inserted
 
 def insert_inspections(df, conn):
     print("Inserting new inspections...", flush=True)
@@ -173,40 +174,55 @@ def insert_inspections(df, conn):
                 row['Risk'],
                 row['Violations'] if pd.notna(row['Violations']) else None
             ))
-
-    
-            inserted += 1
+            inserted += cur.rowcount
         except Exception as e:
             print(f"Error inserting inspection {row.get('ID', 'unknown')}: {e}", flush=True)
 
     conn.commit()
     cur.close()
     print(f"Inserted {inserted} new inspections", flush=True)
+    return inserted
 
 def main():
+    """
+    Load new inspections and return the number of restaurant and inspection
+    rows that were actually inserted or changed.
+    """
     start_time = datetime.now()
     print(f"Starting data load at {start_time}", flush=True)
 
     try:
-        conn = get_connection()
-        df = fetch_inspection_data(conn)
+        with metrics.stage("connect"):
+            conn = get_connection()
+        with metrics.stage("fetch") as s:
+            df = fetch_inspection_data(conn)
+            s.rows = len(df)
         if df.empty:
             print("No new inspections to load.", flush=True)
             conn.close()
-            return
+            return 0
 
-        df = clean_data(df)
-        df = standardize_chain_names(df)
-        insert_restaurants(df, conn)
-        insert_inspections(df, conn)
+        with metrics.stage("clean", rows=len(df)):
+            df = clean_data(df)
+        with metrics.stage("standardize_chain_names", rows=len(df)):
+            df = standardize_chain_names(df)
+        with metrics.stage("insert_restaurants", rows=df['License #'].nunique()):
+            changed = insert_restaurants(df, conn)
+        with metrics.stage("insert_inspections", rows=len(df)):
+            changed += insert_inspections(df, conn)
 
         conn.close()
         duration = (datetime.now() - start_time).total_seconds()
         print(f"\nData load completed successfully in {duration:.2f} seconds", flush=True)
+        return changed
 
     except Exception as e:
         print(f"\nError during data load: {e}", flush=True)
         raise
 
 if __name__ == "__main__":
-    main()
+    try:
+        with metrics.stage("load"):
+            main()
+    finally:
+        metrics.write_report()
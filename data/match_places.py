@@ -0,0 +1,331 @@
+import os
+import re
+import json
+import math
+import time
+import argparse
+import requests
+from difflib import SequenceMatcher
+from psycopg2.extras import execute_values
+
+import metrics
+from chains import CHAIN_VARIANTS, canonical_chain_name
+from update_google_ratings import get_connection, GOOGLE_API_KEY
+
+PLACES_CACHE_FILE = "places_cache.json"
+TEXT_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
+TEXT_SEARCH_COST = 32 / 1000  # USD per Text Search request
+
+# Grid cells are ~330m on a side in Chicago, so with MAX_DISTANCE_M below
+# every candidate in range sits in the restaurant's cell or one of its 8 neighbours.
+CELL_LAT = 0.003
+CELL_LON = 0.004
+MAX_DISTANCE_M = 250
+# Every branch of a chain normalizes to the same name, so name similarity
+# can't tell them apart; only accept a chain place this close to the restaurant.
+CHAIN_MAX_DISTANCE_M = 75
+SEARCH_RADIUS_M = 300.0
+
+NAME_WEIGHT = 0.75
+MIN_NAME_SCORE = 0.6
+MIN_SCORE = 0.7
+
+NAME_STOPWORDS = {"THE", "INC", "LLC", "CORP", "CO", "LTD", "AND", "RESTAURANT"}
+
+
+def normalize_name(name):
+    if not name:
+        return ""
+    name = canonical_chain_name(name).upper()
+    name = re.sub(r"#\s*\d+", " ", name)  # store numbers
+    name = name.replace("&", " AND ").replace("'", "")
+    tokens = re.sub(r"[^A-Z0-9 ]", " ", name).split()
+    return " ".join(t for t in tokens if t not in NAME_STOPWORDS)
+
+CHAIN_NAMES = {normalize_name(canonical) for canonical in CHAIN_VARIANTS}
+
+def name_score(a, b):
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    a_tokens, b_tokens = set(a.split()), set(b.split())
+    # "PIZZA HOUSE" vs "PIZZA HOUSE WICKER PARK"; single words like "PIZZA" are too generic
+    if min(len(a_tokens), len(b_tokens)) > 1 and (a_tokens <= b_tokens or b_tokens <= a_tokens):
+        return 0.9
+    return SequenceMatcher(None, a, b).ratio()
+
+def distance_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+
+def cell(lat, lon):
+    return (math.floor(lat / CELL_LAT), math.floor(lon / CELL_LON))
+
+
+class PlaceIndex:
+    """Places candidates blocked by grid cell so each restaurant only scores its neighbours."""
+
+    def __init__(self, candidates=()):
+        self.cells = {}
+        self.place_ids = set()
+        for candidate in candidates:
+            self.add(candidate)
+
+    def add(self, candidate):
+        if candidate["place_id"] in self.place_ids:
+            return
+        self.place_ids.add(candidate["place_id"])
+        candidate["normalized_name"] = normalize_name(candidate["name"])
+        self.cells.setdefault(cell(candidate["latitude"], candidate["longitude"]), []).append(candidate)
+
+    def nearby(self, lat, lon):
+        row, col = cell(lat, lon)
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                yield from self.cells.get((row + d_row, col + d_col), ())
+
+    def scored_candidates(self, restaurant, taken=()):
+        """Yield (score, candidate) for every acceptable place near the restaurant."""
+        names = {normalize_name(restaurant["dba_name"]), normalize_name(restaurant["aka_name"])} - {""}
+        for candidate in self.nearby(restaurant["latitude"], restaurant["longitude"]):
+            if candidate["place_id"] in taken:
+                continue
+            distance = distance_m(restaurant["latitude"], restaurant["longitude"],
+                                  candidate["latitude"], candidate["longitude"])
+            if distance > MAX_DISTANCE_M:
+                continue
+            if candidate["normalized_name"] in CHAIN_NAMES and distance > CHAIN_MAX_DISTANCE_M:
+                continue
+            names_score = max((name_score(n, candidate["normalized_name"]) for n in names), default=0.0)
+            if names_score < MIN_NAME_SCORE:
+                continue
+            score = NAME_WEIGHT * names_score + (1 - NAME_WEIGHT) * (1 - distance / MAX_DISTANCE_M)
+            if score >= MIN_SCORE:
+                yield score, candidate
+
+
+def assign(index, restaurants, taken):
+    """
+    One-to-one matching: take the highest scoring restaurant/place pairs
+    first, so each place goes to at most one restaurant (the closest, best
+    named one). Assigned place_ids are added to `taken`.
+    """
+    pairs = [
+        (score, restaurant["id"], candidate)
+        for restaurant in restaurants
+        for score, candidate in index.scored_candidates(restaurant, taken)
+    ]
+    pairs.sort(key=lambda pair: pair[0], reverse=True)
+
+    assigned = {}
+    for score, rest_id, candidate in pairs:
+        if rest_id in assigned or candidate["place_id"] in taken:
+            continue
+        assigned[rest_id] = candidate
+        taken.add(candidate["place_id"])
+    return assigned
+
+
+def load_cache(path=PLACES_CACHE_FILE):
+    if not os.path.exists(path):
+        return {"candidates": {}, "matched": {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_cache(cache, path=PLACES_CACHE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def search_places(restaurant):
+    """
+    Text Search around the restaurant's location. Every place returned is kept
+    as a candidate, so one paid call can resolve neighbouring restaurants too.
+    Returns None when the request fails, so the restaurant is retried next run
+    rather than cached as having no match.
+    """
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Goog-Api-Key': GOOGLE_API_KEY,
+        'X-Goog-FieldMask': 'places.name,places.displayName,places.location,places.rating,places.userRatingCount'
+    }
+    body = {
+        "textQuery": f"{restaurant['dba_name']} {restaurant['address']}",
+        "locationBias": {"circle": {
+            "center": {"latitude": restaurant["latitude"], "longitude": restaurant["longitude"]},
+            "radius": SEARCH_RADIUS_M
+        }}
+    }
+
+    try:
+        response = requests.post(TEXT_SEARCH_URL, headers=headers, json=body, timeout=30)
+    except requests.RequestException as e:
+        print(f"  Error: {e}", flush=True)
+        return None
+    metrics.count_http()
+
+    if response.status_code != 200:
+        print(f"  Error: {response.status_code}", flush=True)
+        return None
+
+    return [{
+        # resource name ("places/<id>"), the form update_google_ratings expects
+        'place_id': place.get('name'),
+        'name': place.get('displayName', {}).get('text'),
+        'latitude': place['location']['latitude'],
+        'longitude': place['location']['longitude'],
+        'rating': place.get('rating'),
+        'user_ratings_total': place.get('userRatingCount')
+    } for place in response.json().get('places', []) if place.get('name') and place.get('location')]
+
+
+def fetch_unresolved(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT r.id, r.dba_name, r.aka_name, r.address, r.latitude, r.longitude
+        FROM restaurants r
+        LEFT JOIN google_ratings gr ON gr.restaurant_id = r.id
+        WHERE (gr.restaurant_id IS NULL OR gr.place_id IS NULL)
+          AND r.latitude IS NOT NULL AND r.longitude IS NOT NULL
+          AND UPPER(r.facility_type) LIKE '%RESTAURANT%'
+    """)
+    columns = [desc[0] for desc in cur.description]
+    restaurants = [dict(zip(columns, row)) for row in cur.fetchall()]
+    cur.close()
+    return restaurants
+
+def fetch_taken_place_ids(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT place_id FROM google_ratings WHERE place_id IS NOT NULL")
+    taken = {row[0] for row in cur.fetchall()}
+    cur.close()
+    return taken
+
+def save_matches(conn, matches):
+    cur = conn.cursor()
+    execute_values(cur, """
+        INSERT INTO google_ratings (restaurant_id, place_id, rating, user_ratings_total, updated_at)
+        VALUES %s
+        ON CONFLICT (restaurant_id) DO UPDATE SET
+            place_id = EXCLUDED.place_id,
+            rating = EXCLUDED.rating,
+            user_ratings_total = EXCLUDED.user_ratings_total,
+            updated_at = EXCLUDED.updated_at;
+    """, [
+        (rest_id, place['place_id'], place.get('rating'), place.get('user_ratings_total'))
+        for rest_id, place in matches.items()
+    ], template="(%s, %s, %s, %s, NOW())")
+    conn.commit()
+    cur.close()
+
+
+def match_restaurants(max_api_calls=100, retry_unmatched=False, cache_path=PLACES_CACHE_FILE):
+    cache = load_cache(cache_path)
+    candidates = cache["candidates"]
+    # restaurant id -> place_id, or None when it was searched without a match
+    matched = cache["matched"]
+
+    conn = get_connection()
+    with metrics.stage("fetch_unresolved") as s:
+        restaurants = fetch_unresolved(conn)
+        taken = fetch_taken_place_ids(conn)
+        s.rows = len(restaurants)
+    print(f"📍 {len(restaurants)} restaurants without a place_id", flush=True)
+
+    matches = {}
+    pending = []
+    for restaurant in restaurants:
+        key = str(restaurant["id"])
+        if key in matched and (matched[key] or not retry_unmatched):
+            if matched[key]:
+                matches[restaurant["id"]] = candidates[matched[key]]
+                taken.add(matched[key])
+            continue
+        pending.append(restaurant)
+    print(f"  {len(matches)} already matched in cache, {len(pending)} to resolve", flush=True)
+
+    with metrics.stage("match_cached", rows=len(pending)):
+        index = PlaceIndex(candidates.values())
+        assigned = assign(index, pending, taken)
+    unresolved = [r for r in pending if r["id"] not in assigned]
+    print(f"  {len(assigned)} matched from cached candidates", flush=True)
+
+    # Search only for restaurants with no usable candidate nearby. Walking them
+    # cell by cell lets places returned by one search cover the restaurants
+    # next to it before another call is made.
+    unresolved.sort(key=lambda r: cell(r["latitude"], r["longitude"]))
+    searched = set()
+    api_calls = 0
+    try:
+        with metrics.stage("search_api") as s:
+            for restaurant in unresolved:
+                if api_calls >= max_api_calls:
+                    break
+                if next(index.scored_candidates(restaurant, taken), None):
+                    continue
+                results = search_places(restaurant)
+                api_calls += 1
+                s.rows = api_calls
+                time.sleep(0.05)  # Be nice to the API
+                if results is None:
+                    continue
+                searched.add(restaurant["id"])
+                for candidate in results:
+                    candidates[candidate["place_id"]] = candidate
+                    index.add(candidate)
+
+        with metrics.stage("match_api", rows=len(unresolved)):
+            assigned.update(assign(index, unresolved, taken))
+    finally:
+        for rest_id, place in assigned.items():
+            matched[str(rest_id)] = place["place_id"]
+        # Only a successful search with no match is remembered as a miss; failed
+        # searches and restaurants outbid for a place are tried again next run.
+        for rest_id in searched - set(assigned):
+            matched[str(rest_id)] = None
+        # Paid search results are kept even if the run dies part way
+        save_cache(cache, cache_path)
+
+    names = {r["id"]: r["dba_name"] for r in pending}
+    for rest_id, place in assigned.items():
+        matches[rest_id] = place
+        print(f"  ✓ {names[rest_id]} -> {place['name']}", flush=True)
+
+    if matches:
+        with metrics.stage("save_matches", rows=len(matches)):
+            save_matches(conn, matches)
+    conn.close()
+
+    unmatched = sum(1 for r in pending if r["id"] not in assigned)
+    print("=" * 50, flush=True)
+    print(f"✅ Matched: {len(matches)} restaurants", flush=True)
+    print(f"🔍 Text Search calls: {api_calls}", flush=True)
+    if unmatched:
+        print(f"❌ Still without a place_id: {unmatched}", flush=True)
+    print(f"💰 Estimated cost: ${api_calls * TEXT_SEARCH_COST:.2f}", flush=True)
+    return matches
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find Google place_ids for restaurants that have none.")
+    parser.add_argument("--max-api-calls", type=int, default=100,
+                        help="paid Text Search calls allowed this run (0 matches from the cache only)")
+    parser.add_argument("--retry-unmatched", action="store_true",
+                        help="search again for restaurants that previously found no match")
+    parser.add_argument("--cache", default=PLACES_CACHE_FILE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        with metrics.stage("match_places"):
+            match_restaurants(args.max_api_calls, args.retry_unmatched, args.cache)
+    finally:
+        metrics.write_report()
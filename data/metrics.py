@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import resource
+import threading
+import cProfile
+import psycopg2.extensions
+from contextlib import contextmanager
+from datetime import datetime
+
+# Opt-in profiling: PIPELINE_PROFILE=cprofile|pyinstrument profiles every stage,
+# or only the stages listed (comma separated, e.g. "load/fetch") in PIPELINE_PROFILE_STAGES.
+PROFILER = os.environ.get("PIPELINE_PROFILE", "").lower()
+PROFILE_STAGES = {s.strip() for s in os.environ.get("PIPELINE_PROFILE_STAGES", "").split(",") if s.strip()}
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR", "profiles")
+REPORT_FILE = os.environ.get("PIPELINE_REPORT_FILE", "run_report.json")
+
+
+def current_rss_mb():
+    """Resident set size right now, or None where /proc is unavailable (macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * resource.getpagesize() / (1024 * 1024)
+
+def peak_rss_mb():
+    # Lifetime high-water mark of the process, not of any one stage
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RSSSampler(threading.Thread):
+    """Polls resident memory in the background to find a stage's peak."""
+
+    def __init__(self, interval=0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.start_rss = current_rss_mb()
+        self.peak_rss = self.start_rss
+        self._done = threading.Event()
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def start(self):
+        # Nothing to sample where /proc is unavailable
+        if self.start_rss is not None:
+            super().start()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        """Stop sampling and return how far RSS rose above the start, or None without /proc."""
+        if self.start_rss is None:
+            return None
+        self._done.set()
+        self.join()
+        self._sample()
+        return self.peak_rss - self.start_rss
+
+
+class Stage:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.rows = None
+        self.db_round_trips = 0
+        self.http_round_trips = 0
+        self.duration = 0.0
+        self.peak_rss_delta_mb = None
+        self.children = []
+
+    def to_dict(self):
+        rate = self.rows / self.duration if self.rows and self.duration else None
+        return {
+            "name": self.name,
+            "duration_s": round(self.duration, 4),
+            "rows": self.rows,
+            "rows_per_sec": round(rate, 1) if rate is not None else None,
+            "db_round_trips": self.db_round_trips,
+            "http_round_trips": self.http_round_trips,
+            "peak_rss_delta_mb": round(self.peak_rss_delta_mb, 1) if self.peak_rss_delta_mb is not None else None,
+            "stages": [child.to_dict() for child in self.children],
+        }
+
+
+_started_at = datetime.now()
+_roots = []
+_stack = []
+_profiling = False
+
+
+def _should_profile(path):
+    if PROFILER not in ("cprofile", "pyinstrument") or _profiling:
+        return False
+    return not PROFILE_STAGES or path in PROFILE_STAGES
+
+@contextmanager
+def _profile(path):
+    global _profiling
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    out_name = os.path.join(PROFILE_DIR, path.replace("/", "__"))
+    _profiling = True
+    try:
+        if PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise RuntimeError("PIPELINE_PROFILE=pyinstrument requires `pip install pyinstrument`")
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(f"{out_name}.html", "w") as f:
+                    f.write(profiler.output_html())
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(f"{out_name}.prof")
+    finally:
+        _profiling = False
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Time a stage of work. Stages nest, so a stage opened inside another is
+    reported as its sub-stage. Set `.rows` on the yielded stage to report
+    throughput. Memory is sampled in the background while the stage runs, so
+    the reported peak includes allocations freed before it ends.
+    """
+    parent = _stack[-1] if _stack else None
+    path = f"{parent.path}/{name}" if parent else name
+    current = Stage(name, path)
+    current.rows = rows
+    (parent.children if parent else _roots).append(current)
+
+    _stack.append(current)
+    sampler = RSSSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        if _should_profile(path):
+            with _profile(path):
+                yield current
+        else:
+            yield current
+    finally:
+        current.duration = time.perf_counter() - start
+        current.peak_rss_delta_mb = sampler.stop()
+        _stack.pop()
+
+
+def count_db(n=1):
+    for s in _stack:
+        s.db_round_trips += n
+
+def count_http(n=1):
+    for s in _stack:
+        s.http_round_trips += n
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that records each statement as a DB round trip."""
+
+    def execute(self, query, vars=None):
+        count_db()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        count_db(len(vars_list))
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        count_db()
+        return super().copy_expert(sql, file, size)
+
+
+def track_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        count_db()
+
+    return engine
+
+def track_session(session):
+    """Count every response received through a requests.Session."""
+    session.hooks["response"].append(lambda response, *args, **kwargs: count_http())
+    return session
+
+def track_boto3(client):
+    client.meta.events.register("after-call", lambda **kwargs: count_http())
+    return client
+
+
+def report():
+    return {
+        "started_at": _started_at.isoformat(),
+        "duration_s": round((datetime.now() - _started_at).total_seconds(), 4),
+        "process_peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": [s.to_dict() for s in _roots],
+    }
+
+def write_report(path=REPORT_FILE):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+    print(f"Run report written to {path}", flush=True)
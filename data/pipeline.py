@@ -0,0 +1,141 @@
+import argparse
+import boto3
+from datetime import datetime
+from graphlib import TopologicalSorter
+
+import load_data
+import export_for_tableau
+import s3_to_sheets
+import metrics
+
+BUCKET_NAME = s3_to_sheets.BUCKET_NAME
+STATE_TABLE = "pipeline_state"
+
+
+def ensure_state_table(cur):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            name TEXT PRIMARY KEY,
+            value TIMESTAMPTZ
+        );
+    """)
+
+def write_state(cur, name, value):
+    cur.execute(f"""
+        INSERT INTO {STATE_TABLE} (name, value) VALUES (%s, %s)
+        ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value;
+    """, (name, value))
+
+
+def run_load(inputs):
+    changed = load_data.main()
+
+    conn = load_data.get_connection()
+    cur = conn.cursor()
+    ensure_state_table(cur)
+    cur.execute("SELECT NOW();")
+    checked_at = cur.fetchone()[0]
+    if changed:
+        write_state(cur, 'last_changed', checked_at)
+
+    # Export whenever anything changed since the last successful export, not
+    # just in this run, so a rerun after a failed export or sync still catches
+    # up. Ratings are written outside the pipeline (update_google_ratings,
+    # match_places), so their timestamps count too.
+    cur.execute(f"""
+        SELECT e.value IS NULL
+            OR c.value > e.value
+            OR (SELECT MAX(updated_at) FROM google_ratings) > e.value
+        FROM (SELECT 1) one
+        LEFT JOIN {STATE_TABLE} e ON e.name = 'last_exported'
+        LEFT JOIN {STATE_TABLE} c ON c.name = 'last_changed';
+    """)
+    pending = bool(cur.fetchone()[0])
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    return {'changed': changed, 'pending': pending, 'checked_at': checked_at}
+
+def run_export(inputs):
+    # Frames stay in memory; the CSV files in dumps/ are only written when run standalone
+    return export_for_tableau.export_all(save=False)
+
+def run_upload(inputs):
+    s3 = metrics.track_boto3(boto3.client("s3"))
+    for table_name, df in inputs['export'].items():
+        csv_name = f"{table_name}.csv"
+        print(f"Uploading {csv_name} to S3...", flush=True)
+        s3.put_object(Bucket=BUCKET_NAME, Key=csv_name, Body=df.to_csv(index=False).encode('utf-8'))
+
+def run_sheets(inputs):
+    s3_to_sheets.sync_frames(inputs['export'])
+
+def run_mark_exported(inputs):
+    conn = load_data.get_connection()
+    cur = conn.cursor()
+    write_state(cur, 'last_exported', inputs['load']['checked_at'])
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+# stage name -> (upstream stages, function, check on the result that must pass
+# for downstream stages to run, or None)
+STAGES = {
+    'load': ((), run_load, lambda result: result['pending']),
+    'export': (('load',), run_export, None),
+    'upload': (('export',), run_upload, None),
+    'sheets': (('export', 'upload'), run_sheets, None),
+    'mark_exported': (('load', 'sheets'), run_mark_exported, None),
+}
+
+
+def run_pipeline(stages=STAGES, force=False):
+    """
+    Run the stages in dependency order within a single process, handing each
+    stage the in-memory results of its upstream stages.
+    """
+    start_time = datetime.now()
+    print(f"Starting pipeline at {start_time}", flush=True)
+
+    graph = {name: deps for name, (deps, _, _) in stages.items()}
+    results = {}
+    # stages whose dependents should not run
+    halted = set()
+
+    for name in TopologicalSorter(graph).static_order():
+        deps, func, gate = stages[name]
+
+        if any(dep in halted for dep in deps):
+            print(f"[{name}] skipped", flush=True)
+            halted.add(name)
+            continue
+
+        print(f"[{name}] starting", flush=True)
+        with metrics.stage(name) as s:
+            results[name] = func({dep: results[dep] for dep in deps})
+        print(f"[{name}] finished in {s.duration:.2f} seconds", flush=True)
+
+        if gate and not gate(results[name]) and not force:
+            print(f"[{name}] nothing changed since the last export; skipping downstream stages", flush=True)
+            halted.add(name)
+
+    duration = (datetime.now() - start_time).total_seconds()
+    print(f"\nPipeline completed in {duration:.2f} seconds", flush=True)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the daily inspections pipeline in one process.")
+    parser.add_argument("--force", action="store_true",
+                        help="run downstream stages even when nothing changed since the last export")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        run_pipeline(force=args.force)
+    finally:
+        metrics.write_report()
@@ -6,6 +6,8 @@ import gspread
 from google.oauth2.service_account import Credentials
 import hashlib
 
+import metrics
+
 BUCKET_NAME = "inspection-data-dump"
 CSV_FILES = ["restaurants.csv", "inspections.csv", "google_ratings.csv", "inspection_categories.csv"]
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
@@ -16,41 +18,43 @@ NUMERIC_COLUMNS = {
     'inspection_categories': ['id', 'restaurant_license', 'zip', 'category_violation_count']
 }
 
-creds_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "gcp-credentials.json")
-creds = Credentials.from_service_account_file(creds_file, scopes=SCOPES)
-gc = gspread.authorize(creds)
-SHEET_ID = os.environ["GOOGLE_SHEET_ID"]
-sh = gc.open_by_key(SHEET_ID)
-s3 = boto3.client("s3")
+
+def open_sheet():
+    creds_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "gcp-credentials.json")
+    creds = Credentials.from_service_account_file(creds_file, scopes=SCOPES)
+    gc = gspread.authorize(creds)
+    metrics.track_session(gc.http_client.session)
+    return gc.open_by_key(os.environ["GOOGLE_SHEET_ID"])
 
 def hash_df(df):
     return hashlib.md5(df.to_csv(index=False).encode('utf-8')).hexdigest()
 
-for csv_name in CSV_FILES:
-    print(f"Syncing {csv_name}...", flush=True)
-    obj = s3.get_object(Bucket=BUCKET_NAME, Key=csv_name)
-    df = pd.read_csv(io.BytesIO(obj["Body"].read()))
-    
-    df = df.replace([float('inf'), float('-inf')], float('nan'))
-    
-    table_name = os.path.splitext(csv_name)[0]
+def prepare_frame(df, table_name):
+    """Coerce numeric columns to numbers and blank out missing values in the rest."""
     numeric_cols = NUMERIC_COLUMNS.get(table_name, [])
-    
+    df = df.copy()
+
     for col in df.columns:
+        values = df[col].astype(object)
         if col in numeric_cols:
-            pass
+            values = values.where(values.notna(), float('nan'))
+            df[col] = pd.to_numeric(values, errors='coerce').replace([float('inf'), float('-inf')], float('nan'))
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            # same text to_csv would write, so sheet values compare equal either way
+            df[col] = df[col].astype(str).where(df[col].notna(), '')
         else:
-            df[col] = df[col].fillna('')
-    
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
+            df[col] = values.where(values.notna(), '')
+
+    return df
+
+def sync_frame(sh, table_name, df):
+    numeric_cols = NUMERIC_COLUMNS.get(table_name, [])
     new_hash = hash_df(df)
-    
+
     try:
         ws = sh.worksheet(table_name)
-        existing = ws.get_all_values()
+        with metrics.stage("fetch_existing"):
+            existing = ws.get_all_values()
         if existing:
             existing_df = pd.DataFrame(existing[1:], columns=existing[0])
             existing_df = existing_df.replace([float('inf'), float('-inf')], float('nan'))
@@ -60,42 +64,69 @@ for csv_name in CSV_FILES:
                 else:
                     existing_df[col] = existing_df[col].fillna('')
             existing_hash = hash_df(existing_df)
-            
+
             if existing_hash == new_hash:
-                print(f"Skipped {csv_name} (no changes)", flush=True)
-                continue
+                print(f"Skipped {table_name} (no changes)", flush=True)
+                return False
         ws.clear()
     except gspread.WorksheetNotFound:
         ws = sh.add_worksheet(title=table_name, rows=str(len(df)+10), cols=str(len(df.columns)))
-    
+
     data = [df.columns.values.tolist()]
-    
-    for _, row in df.iterrows():
-        row_data = []
-        for col in df.columns:
-            val = row[col]
-            if pd.isna(val) and col in numeric_cols:
-                row_data.append('')
-            elif pd.isna(val):
-                row_data.append('')
-            else:
-                row_data.append(val)
-        data.append(row_data)
-    
-    ws.update(data)
-    
-    for col in numeric_cols:
-        if col in df.columns:
-            col_idx = df.columns.get_loc(col) + 1
-            col_letter = chr(64 + col_idx)
-            pattern = "0" if col in ['id', 'restaurant_id', 'restaurant_license', 'license_number', 'user_ratings_total', 'zip', 'violation_count', 'category_violation_count'] else "0.0##"
-            ws.format(f'{col_letter}2:{col_letter}', {
-                "numberFormat": {
-                    "type": "NUMBER",
-                    "pattern": pattern
-                }
-            })
-    
+
+    with metrics.stage("build_rows", rows=len(df)):
+        for _, row in df.iterrows():
+            row_data = []
+            for col in df.columns:
+                val = row[col]
+                if pd.isna(val) and col in numeric_cols:
+                    row_data.append('')
+                elif pd.isna(val):
+                    row_data.append('')
+                else:
+                    row_data.append(val)
+            data.append(row_data)
+
+    with metrics.stage("upload", rows=len(df)):
+        ws.update(data)
+
+        for col in numeric_cols:
+            if col in df.columns:
+                col_idx = df.columns.get_loc(col) + 1
+                col_letter = chr(64 + col_idx)
+                pattern = "0" if col in ['id', 'restaurant_id', 'restaurant_license', 'license_number', 'user_ratings_total', 'zip', 'violation_count', 'category_violation_count'] else "0.0##"
+                ws.format(f'{col_letter}2:{col_letter}', {
+                    "numberFormat": {
+                        "type": "NUMBER",
+                        "pattern": pattern
+                    }
+                })
+
     print(f"Synced {len(df)} rows", flush=True)
+    return True
 
-print("All files synced to Google Sheets!", flush=True)
\ No newline at end of file
+def sync_frames(frames, sh=None):
+    """Sync frames, keyed by table name, to Google Sheets."""
+    sh = sh or open_sheet()
+    for table_name, df in frames.items():
+        print(f"Syncing {table_name}...", flush=True)
+        with metrics.stage(table_name, rows=len(df)):
+            sync_frame(sh, table_name, prepare_frame(df, table_name))
+    print("All files synced to Google Sheets!", flush=True)
+
+def main():
+    s3 = metrics.track_boto3(boto3.client("s3"))
+    frames = {}
+    with metrics.stage("s3_download"):
+        for csv_name in CSV_FILES:
+            obj = s3.get_object(Bucket=BUCKET_NAME, Key=csv_name)
+            frames[os.path.splitext(csv_name)[0]] = pd.read_csv(io.BytesIO(obj["Body"].read()))
+    with metrics.stage("sheets_sync"):
+        sync_frames(frames)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        metrics.write_report()
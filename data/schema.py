@@ -0,0 +1,108 @@
+import pandas as pd
+
+CATEGORY = "category"
+INT = "Int64"
+FLOAT64 = "float64"
+DATE = "date"
+TEXT = "text"
+
+# Column dtypes for the Postgres tables, used when reading query results.
+# Low-cardinality labels are categoricals; names and addresses are close to
+# unique per restaurant, so they stay text. IDs are nullable integers so NULLs
+# don't push them to object/float. Floats stay float64: coordinates are written
+# back to Postgres, and ratings are pushed to Sheets, where float32 error
+# (4.3 -> 4.300000190734863) would change the cells and the sync hash every run.
+TABLES = {
+    "restaurants": {
+        "id": INT,
+        "license_number": INT,
+        "dba_name": TEXT,
+        "aka_name": TEXT,
+        "facility_type": CATEGORY,
+        "address": TEXT,
+        "city": CATEGORY,
+        "state": CATEGORY,
+        "zip": INT,
+        "latitude": FLOAT64,
+        "longitude": FLOAT64,
+        "created_at": DATE,
+    },
+    "inspections": {
+        "id": INT,
+        "restaurant_license": INT,
+        "inspection_date": DATE,
+        "inspection_type": CATEGORY,
+        "result": CATEGORY,
+        "risk": CATEGORY,
+        "violations": TEXT,
+    },
+    "google_ratings": {
+        "id": INT,
+        "restaurant_id": INT,
+        "place_id": TEXT,
+        "rating": FLOAT64,
+        "user_ratings_total": INT,
+        "updated_at": DATE,
+    },
+}
+
+
+# Columns of the frame built from the SODA API in load_data
+INGEST_COLUMNS = {
+    "ID": INT,
+    "License #": INT,
+    "Zip": INT,
+    "Inspection Date": DATE,
+    "Inspection Type": CATEGORY,
+    "Facility Type": CATEGORY,
+    "Results": CATEGORY,
+    "Risk": CATEGORY,
+    "City": CATEGORY,
+    "State": CATEGORY,
+    "Latitude": FLOAT64,
+    "Longitude": FLOAT64,
+}
+
+
+def dtypes_for(*tables):
+    """Column dtypes for a query over `tables`; a column name shared with a different dtype is an error."""
+    columns = {}
+    for table in tables:
+        for col, dtype in TABLES[table].items():
+            if columns.setdefault(col, dtype) != dtype:
+                raise ValueError(f"Column '{col}' has conflicting dtypes across {', '.join(tables)}")
+    return columns
+
+
+def concat_chunks(chunks):
+    """Concatenate typed chunks, unioning categories so categoricals don't fall back to object."""
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categories = chunks[0][col].cat.categories
+            for chunk in chunks[1:]:
+                categories = categories.union(chunk[col].cat.categories)
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def apply_schema(df, columns):
+    """Cast the columns of `df` that appear in `columns` to their declared dtype."""
+    for col, dtype in columns.items():
+        if col not in df.columns:
+            continue
+        if dtype == CATEGORY:
+            df[col] = df[col].astype(CATEGORY)
+        elif dtype == INT:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(INT)
+        elif dtype == FLOAT64:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        elif dtype == DATE:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif dtype == TEXT:
+            df[col] = df[col].fillna("")
+    return df
@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+
+from chains import CHAIN_VARIANTS
+
+# Bounding box that keeps generated points inside the city
+CHICAGO_LAT = (41.65, 42.02)
+CHICAGO_LON = (-87.92, -87.53)
+
+FACILITY_TYPES = ["Restaurant", "Restaurant", "Restaurant", "Grocery Store", "School",
+                  "Bakery", "Daycare (2 - 6 Years)", "Mobile Food Dispenser", "Children's Services Facility"]
+RISKS = ["Risk 1 (High)", "Risk 1 (High)", "Risk 2 (Medium)", "Risk 3 (Low)", "All"]
+RESULTS = ["Pass", "Pass", "Pass w/ Conditions", "Fail", "No Entry", "Not Ready", "Out of Business"]
+INSPECTION_TYPES = ["Canvass", "Canvass Re-Inspection", "License", "Complaint",
+                    "Short Form Complaint", "License Re-Inspection", "Suspected Food Poisoning"]
+STREETS = ["N CLARK ST", "W MADISON ST", "S STATE ST", "N MILWAUKEE AVE", "W DIVISION ST",
+           "N BROADWAY", "S HALSTED ST", "W BELMONT AVE", "N LINCOLN AVE", "E 47TH ST"]
+NAME_WORDS = ["GOLDEN", "LUCKY", "TACO", "PIZZA", "GRILL", "CAFE", "KITCHEN", "DRAGON",
+              "HOUSE", "EXPRESS", "BURGER", "SUSHI", "DELI", "CANTINA", "BISTRO", "GYROS"]
+VIOLATION_DESCRIPTIONS = [
+    "PROPER COLD HOLDING TEMPERATURES",
+    "FOOD AND NON-FOOD CONTACT SURFACES CLEANABLE, PROPERLY DESIGNED, CONSTRUCTED AND USED",
+    "PERSON IN CHARGE PRESENT, DEMONSTRATES KNOWLEDGE, AND PERFORMS DUTIES",
+    "INSECTS, RODENTS, & ANIMALS NOT PRESENT",
+    "NON-FOOD/FOOD CONTACT SURFACES CLEAN",
+    "PHYSICAL FACILITIES INSTALLED, MAINTAINED & CLEAN",
+    "ADEQUATE HANDWASHING SINKS PROPERLY SUPPLIED AND ACCESSIBLE",
+]
+COMMENTS = [
+    "OBSERVED NO SOAP AT HANDWASHING SINK. INSTRUCTED TO PROVIDE.",
+    "MUST CLEAN AND MAINTAIN FLOORS UNDER COOKING EQUIPMENT.",
+    "OBSERVED MICE DROPPINGS IN REAR STORAGE AREA. INSTRUCTED TO REMOVE AND SANITIZE.",
+    "FOUND TCS FOODS AT 48F IN PREP COOLER. PRIORITY VIOLATION 7-38-005.",
+    "NEED VALID CITY OF CHICAGO FOOD HANDLER CERTIFICATES FOR ALL EMPLOYEES.",
+]
+
+
+def _restaurant(rng, license_number):
+    chain = rng.random() < 0.15
+    if chain:
+        aka_name = rng.choice(rng.choice(list(CHAIN_VARIANTS.values())))
+        # variants show up in mixed case and with store numbers appended
+        aka_name = rng.choice([aka_name, aka_name.upper(), aka_name.title()])
+        if rng.random() < 0.5:
+            aka_name = f"{aka_name} #{rng.randint(100, 9999)}"
+    else:
+        aka_name = " ".join(rng.sample(NAME_WORDS, rng.randint(1, 3)))
+    return {
+        "license_": str(license_number),
+        "dba_name": aka_name.upper() if rng.random() < 0.7 else f"{aka_name.upper()} INC",
+        "aka_name": aka_name if rng.random() < 0.9 else None,
+        "facility_type": rng.choice(FACILITY_TYPES) if rng.random() < 0.98 else None,
+        "risk": rng.choice(RISKS),
+        "address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)} ",
+        "city": rng.choice(["CHICAGO", "CHICAGO", "CHICAGO", "Chicago", "CHCICAGO"]),
+        "state": "IL",
+        "zip": str(rng.randint(60601, 60661)),
+        "latitude": f"{rng.uniform(*CHICAGO_LAT):.15f}",
+        "longitude": f"{rng.uniform(*CHICAGO_LON):.15f}",
+    }
+
+
+def _violations(rng):
+    n = rng.choice([0, 0, 1, 2, 3, 4, 5, 6, 8, 10])
+    if n == 0:
+        return None
+    codes = sorted(rng.sample(range(1, 64), n))
+    return " | ".join(
+        f"{code}. {rng.choice(VIOLATION_DESCRIPTIONS)} - Comments: {rng.choice(COMMENTS)}"
+        for code in codes
+    )
+
+
+def generate_records(n, seed=42, start=date(2015, 1, 1), end=date(2025, 10, 1)):
+    """
+    Generate `n` inspection records shaped like the Chicago SODA JSON API
+    response, with roughly five inspections per restaurant.
+    """
+    rng = random.Random(seed)
+    restaurants = [_restaurant(rng, 1000000 + i) for i in range(max(1, n // 5))]
+    span = (end - start).days
+
+    records = []
+    for i in range(n):
+        record = dict(rng.choice(restaurants))
+        record.update({
+            "inspection_id": str(2000000 + i),
+            "inspection_date": f"{start + timedelta(days=rng.randint(0, span))}T00:00:00.000",
+            "inspection_type": rng.choice(INSPECTION_TYPES),
+            "results": rng.choice(RESULTS),
+        })
+        violations = _violations(rng)
+        if violations:
+            record["violations"] = violations
+        # the API omits empty fields, so drop Nones the same way
+        records.append({k: v for k, v in record.items() if v is not None})
+    return records
@@ -4,6 +4,8 @@ import time
 import os
 from urllib.parse import urlparse
 
+import metrics
+
 # Read Google API key from environment
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
@@ -22,7 +24,8 @@ def get_connection():
         user=parsed_url.username,
         password=parsed_url.password,
         host=parsed_url.hostname,
-        port=parsed_url.port
+        port=parsed_url.port,
+        cursor_factory=metrics.CountingCursor
     )
 
 def get_place_details_by_id(place_id):
@@ -41,6 +44,7 @@ def get_place_details_by_id(place_id):
     }
     
     response = requests.get(url, headers=headers)
+    metrics.count_http()
     
     if response.status_code == 200:
         place = response.json()
@@ -145,4 +149,8 @@ if __name__ == "__main__":
     else:
         print(f"✅ Found {with_ids} restaurants with existing place_ids")
         print(f"💰 Updating ratings... (100% FREE)\n")
-        update_ratings_from_existing_place_ids()
\ No newline at end of file
+        try:
+            with metrics.stage("update_ratings", rows=with_ids):
+                update_ratings_from_existing_place_ids()
+        finally:
+            metrics.write_report()
\ No newline at end of file